@@ -1,41 +1,385 @@
+import asyncio
+import base64
+import binascii
+import hashlib
+import itertools
+import operator
 import os
-from typing import Any, Dict, List
+import ssl
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Literal, Optional, Tuple
 
+import aiohttp
+import certifi
+import numpy as np
+import orjson
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html
-from fastapi.responses import HTMLResponse
-from pinecone import Pinecone
-from pydantic import BaseModel, Field
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response
+from fastapi.staticfiles import StaticFiles
+from pinecone import PineconeAsyncio
+from prometheus_client import Counter, Histogram
+from prometheus_fastapi_instrumentator import Instrumentator
+from pydantic import BaseModel, Field, FiniteFloat, PrivateAttr, model_validator
+
+# 環境変数の読み込み
+load_dotenv()
+INDEX_NAME = "quickstart"
+# CORSで許可するオリジン（カンマ区切り）
+ALLOWED_ORIGINS = [
+    origin.strip()
+    for origin in os.getenv("ALLOWED_ORIGINS", "http://localhost:8000").split(",")
+    if origin.strip()
+]
+# Pineconeへの接続プールの最大接続数（PINECONE_CONCURRENCY以上にする）
+PINECONE_POOL_SIZE = int(os.getenv("PINECONE_POOL_SIZE", "64"))
+# Pineconeを呼び出すリクエストの同時受け付け数、およびワーカー全体でPineconeへ
+# 同時に発行する呼び出し数の上限と、受け付けの空きを待つ最大秒数
+# （呼び出し数がPINECONE_POOL_SIZEを超えないよう、PINECONE_POOL_SIZE以下にする）
+PINECONE_CONCURRENCY = int(os.getenv("PINECONE_CONCURRENCY", "32"))
+PINECONE_ACQUIRE_TIMEOUT = float(os.getenv("PINECONE_ACQUIRE_TIMEOUT", "5"))
+# 1リクエスト（バッチ検索・分割upsert）からPineconeへ同時に発行する呼び出し数の上限
+PINECONE_REQUEST_FANOUT = int(os.getenv("PINECONE_REQUEST_FANOUT", "8"))
+# 1リクエストで受け付けるupsertベクトル数・バッチ検索クエリ数の上限
+MAX_UPSERT_VECTORS = 1000
+MAX_BATCH_QUERIES = 1000
+# バッチ検索1リクエストで返す一致件数（クエリ数×top_k）の上限
+MAX_BATCH_MATCHES = 100000
+# /statusのlist_indexes結果をキャッシュする秒数
+STATUS_CACHE_TTL = 10
+# /searchの類似度キャッシュの最大件数
+SEARCH_CACHE_SIZE = 4096
+# ヒットとみなすコサイン類似度の閾値。ヒット時は元のクエリのスコアをそのまま返すため、
+# 低次元のインデックスでも別のクエリとみなせないよう、既定値はほぼ完全一致とする
+SEARCH_CACHE_THRESHOLD = float(os.getenv("SEARCH_CACHE_THRESHOLD", "0.9999"))
+# /searchの類似度キャッシュの有効期限（秒）。upsertによる破棄は同じワーカー内にしか
+# 届かないため、他のワーカーでも古い結果が返るのはこの秒数までに抑える
+SEARCH_CACHE_TTL = 60
+
+
+async def configure_connection_pool(index) -> None:
+    """IndexAsyncioのaiohttpセッションを、接続を使い回すコネクタに差し替える
+
+    SDKが生成するコネクタは接続数やkeep-alive時間を設定できないため、
+    同じSSL・プロキシ設定のままプールサイズなどを調整したセッションに置き換える。
+    """
+    config = index._openapi_config
+    rest_client = index._api_client.rest_client
+    ssl_context = ssl.create_default_context(cafile=config.ssl_ca_cert or certifi.where())
+    connector = aiohttp.TCPConnector(
+        ssl=ssl_context if config.verify_ssl else False,
+        limit=config.connection_pool_maxsize,
+        keepalive_timeout=60,
+        ttl_dns_cache=300,
+    )
+    old_session = rest_client._session
+    if config.proxy:
+        rest_client._session = aiohttp.ClientSession(connector=connector, proxy=config.proxy)
+    else:
+        rest_client._session = aiohttp.ClientSession(connector=connector)
+    await old_session.close()
+
+
+class SimilarityCache:
+    """クエリベクトルとのコサイン類似度が閾値以上の過去の検索結果を返すLRUキャッシュ
+
+    キーは正規化済みベクトルとして事前確保した(maxsize, dimension)の配列に保持し、
+    検索時は1回の行列ベクトル積で全キーとの類似度を計算する。
+    エントリはttl秒で期限切れとなる。clear()はこのプロセス内のキャッシュしか
+    破棄しないため、複数ワーカー構成では他のワーカーの結果はttlまで残る。
+    """
+
+    def __init__(self, maxsize: int, threshold: float, dimension: int, ttl: float):
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.ttl = ttl
+        # clear()のたびに進む世代番号（破棄前に開始した検索の結果を格納しないため）
+        self.generation = 0
+        self._keys = np.zeros((maxsize, dimension), dtype=np.float32)
+        self._values: List[Optional[bytes]] = [None] * maxsize
+        # 各スロットを最後に使用した時刻（満杯時に最も古いスロットを上書きする）
+        self._last_used = np.zeros(maxsize, dtype=np.int64)
+        # 各スロットを格納した時刻（time.monotonic()）
+        self._inserted_at = np.zeros(maxsize, dtype=np.float64)
+        self._clock = 0
+        self._size = 0
+        # 検索ごとの配列確保を避けるための作業用バッファ
+        self._query = np.empty(dimension, dtype=np.float32)
+        self._sims = np.empty(maxsize, dtype=np.float32)
+
+    def _touch(self, slot: int) -> None:
+        self._clock += 1
+        self._last_used[slot] = self._clock
+
+    def get(self, vector: np.ndarray) -> Optional[bytes]:
+        if self._size == 0:
+            return None
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return None
+        np.divide(vector, norm, out=self._query)
+        sims = self._sims[: self._size]
+        np.matmul(self._keys[: self._size], self._query, out=sims)
+        # 期限切れのスロットはヒットしないよう類似度を下げる
+        expired = self._inserted_at[: self._size] < time.monotonic() - self.ttl
+        sims[expired] = -np.inf
+        best = int(sims.argmax())
+        # NaNとの比較は常に偽になるため、否定形で判定してNaNをヒットとみなさない
+        if not sims[best] >= self.threshold:
+            return None
+        self._touch(best)
+        return self._values[best]
+
+    def put(self, vector: np.ndarray, body: bytes, generation: int) -> None:
+        # 検索中にclear()された場合、その結果は破棄前のインデックスに基づくため格納しない
+        if generation != self.generation:
+            return
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return
+        if self._size < self.maxsize:
+            slot = self._size
+            self._size += 1
+        else:
+            slot = int(self._last_used.argmin())
+        np.divide(vector, norm, out=self._keys[slot])
+        self._values[slot] = body
+        self._inserted_at[slot] = time.monotonic()
+        self._touch(slot)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._size = 0
+        self._values = [None] * self.maxsize
+
+
+# Pineconeクライアントのライフサイクル管理
+# aiohttpのセッションは実行中のイベントループに紐づくため、起動時に生成する
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    pc = PineconeAsyncio(api_key=os.getenv("PINECONE_API_KEY"))
+    # 起動処理の途中で失敗しても、生成済みのクライアントを確実に閉じる
+    index = None
+    try:
+        # PINECONE_HOSTが指定されていればdescribe_indexの往復を省略する
+        host = os.getenv("PINECONE_HOST")
+        dimension = os.getenv("PINECONE_DIMENSION")
+        dimension = int(dimension) if dimension else None
+        metric = os.getenv("PINECONE_METRIC") or None
+        if not host:
+            description = await pc.describe_index(INDEX_NAME)
+            host, dimension = description.host, description.dimension
+            metric = description.metric
+        app.state.pc = pc
+        index = app.state.index = pc.IndexAsyncio(
+            host=host, connection_pool_maxsize=PINECONE_POOL_SIZE
+        )
+        await configure_connection_pool(index)
+        # クエリベクトルの次元数チェックと量子化の可否判定に使うため、
+        # インデックスの次元数と距離指標を保持する
+        # （PINECONE_HOSTのみ指定され、PINECONE_DIMENSIONかPINECONE_METRICが未指定の場合だけ取得する）
+        if dimension is None or metric is None:
+            stats = await index.describe_index_stats()
+            dimension = dimension if dimension is not None else stats.dimension
+            metric = metric or stats.metric
+        app.state.dimension = dimension
+        app.state.metric = metric
+        app.state.pinecone_admission_sem = asyncio.Semaphore(PINECONE_CONCURRENCY)
+        app.state.pinecone_call_sem = asyncio.Semaphore(PINECONE_CONCURRENCY)
+        app.state.status_lock = asyncio.Lock()
+        app.state.status_cache = None
+        app.state.status_expires_at = 0.0
+        app.state.search_cache = SimilarityCache(
+            SEARCH_CACHE_SIZE, SEARCH_CACHE_THRESHOLD, dimension, SEARCH_CACHE_TTL
+        )
+        yield
+    finally:
+        try:
+            if index is not None:
+                await index.close()
+        finally:
+            await pc.close()
+
 
 # FastAPI初期化
 app = FastAPI(
     title="Pinecone Vector Search API",
     description="Vector similarity search using Pinecone",
     version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+    # /docs は下のカスタムSwagger UIエンドポイントで提供する
+    docs_url=None,
 )
 
 # CORSの設定
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type", "Authorization"],
+    max_age=86400,
 )
 
-# 環境変数とPineconeの設定
-load_dotenv()
-pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-index = pc.Index("quickstart")
+# 入力検証エラーの応答
+# エラーには入力値が含まれるため、NaNなども出力できるorjsonでエンコードする
+@app.exception_handler(RequestValidationError)
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    return ORJSONResponse(
+        status_code=422, content={"detail": jsonable_encoder(exc.errors())}
+    )
+
+
+# レスポンスの圧縮設定
+app.add_middleware(GZipMiddleware, minimum_size=500)
+
+# メトリクスの設定（エンドポイントごとのリクエスト数・レイテンシを /metrics で公開する）
+Instrumentator().instrument(app).expose(app, include_in_schema=False)
+PINECONE_REQUEST_SECONDS = Histogram(
+    "pinecone_request_duration_seconds",
+    "Duration of Pinecone API calls",
+    ["operation"],
+)
+PINECONE_REJECTED_REQUESTS = Counter(
+    "pinecone_rejected_requests_total",
+    "Requests rejected because no Pinecone concurrency slot became free",
+)
+
+
+@asynccontextmanager
+async def pinecone_admission(app: FastAPI):
+    """Pineconeを呼び出すリクエストの同時受け付け数を制限する
+
+    上限に達している場合は空きを待ち、PINECONE_ACQUIRE_TIMEOUT秒以内に
+    空かなければ503を返して負荷を逃がす。待つのはリクエストの受け付け時の
+    1回だけで、受け付け後のPineconeの呼び出しはタイムアウトの対象にならない。
+    """
+    sem = app.state.pinecone_admission_sem
+    try:
+        await asyncio.wait_for(sem.acquire(), timeout=PINECONE_ACQUIRE_TIMEOUT)
+    except asyncio.TimeoutError:
+        PINECONE_REJECTED_REQUESTS.inc()
+        raise HTTPException(
+            status_code=503,
+            detail="Too many concurrent requests to Pinecone",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        yield
+    finally:
+        sem.release()
+
+
+@asynccontextmanager
+async def pinecone_call(app: FastAPI, operation: str):
+    """ワーカー全体でのPineconeへの同時呼び出し数を制限し、呼び出し時間を記録する
+
+    受け付け済みのリクエストからの呼び出しのため、タイムアウトせずに空きを待つ。
+    """
+    async with app.state.pinecone_call_sem:
+        with PINECONE_REQUEST_SECONDS.labels(operation).time():
+            yield
+
+
+async def gather_or_cancel(aws: Iterable[Any]) -> List[Any]:
+    """全てのawaitableを並行して待ち、いずれかが失敗したら残りをキャンセルする"""
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def chunks(iterable: Iterable[Any], batch_size: int) -> Iterator[Tuple[Any, ...]]:
+    """iterableをbatch_size件ずつのタプルに分割する"""
+    it = iter(iterable)
+    chunk = tuple(itertools.islice(it, batch_size))
+    while chunk:
+        yield chunk
+        chunk = tuple(itertools.islice(it, batch_size))
+
+
+# マッチ結果から id, score, metadata をまとめて取り出す
+get_match_fields = operator.attrgetter("id", "score", "metadata")
+
+
+def serialize_matches(matches: Iterable[Any]) -> List[Dict[str, Any]]:
+    """Pineconeのマッチ結果をレスポンス用の辞書のリストに変換する"""
+    return [
+        {"id": id_, "score": score, "metadata": metadata}
+        for id_, score, metadata in map(get_match_fields, matches)
+    ]
+
+
+# int8量子化のスケールを保存するメタデータのキー
+QUANTIZATION_SCALE_KEY = "quantization_scale"
+
+
+def quantize_int8(values: List[float]) -> Tuple[List[float], float]:
+    """ベクトルを対称int8量子化し、-127〜127の整数値とスケールを返す
+
+    コサイン類似度はベクトルの大きさに依存しないため、量子化した値をそのまま
+    インデックスに保存しても、元のクエリベクトルでほぼ同じ検索結果が得られる。
+    """
+    v = np.asarray(values, dtype=np.float32)
+    max_abs = float(np.abs(v).max()) if v.size else 0.0
+    scale = max_abs / 127 if max_abs else 1.0
+    # Pineconeのvaluesはfloatのみ受け付けるため、整数値をfloatのまま返す
+    return np.round(v / scale).tolist(), scale
+
+
+def quantize_vector(vector: "Vector") -> Dict[str, Any]:
+    """upsert用のベクトルのvaluesをint8量子化し、スケールをメタデータに保存する"""
+    values, scale = quantize_int8(vector.values)
+    metadata = {**(vector.metadata or {}), QUANTIZATION_SCALE_KEY: scale}
+    return {"id": vector.id, "values": values, "metadata": metadata}
 
 
 # データモデル
 class SearchQuery(BaseModel):
-    query_vector: List[float] = Field(
-        ..., example=[0.1, 0.2], description="Query vector for similarity search"
+    query_vector: Optional[List[FiniteFloat]] = Field(
+        default=None, example=[0.1, 0.2], description="Query vector for similarity search"
     )
+    query_vector_b64: Optional[str] = Field(
+        default=None,
+        example="zczMPc3MTD4=",
+        description="Query vector as base64-encoded little-endian float32 bytes",
+    )
+    _vector: np.ndarray = PrivateAttr()
+
+    @model_validator(mode="after")
+    def decode_vector(self):
+        if (self.query_vector is None) == (self.query_vector_b64 is None):
+            raise ValueError("Specify exactly one of query_vector or query_vector_b64")
+        if self.query_vector_b64 is None:
+            self._vector = np.asarray(self.query_vector, dtype=np.float32)
+        else:
+            try:
+                raw = base64.b64decode(self.query_vector_b64, validate=True)
+            except binascii.Error:
+                raise ValueError("query_vector_b64 is not valid base64")
+            if len(raw) % 4:
+                raise ValueError("query_vector_b64 must contain float32 values")
+            self._vector = np.frombuffer(raw, dtype="<f4")
+        if not np.isfinite(self._vector).all():
+            raise ValueError("Query vector must not contain NaN or infinity")
+        return self
+
+    @property
+    def vector(self) -> np.ndarray:
+        """クエリベクトルをfloat32のNumPy配列として返す"""
+        return self._vector
 
 
 class SearchResponse(BaseModel):
@@ -44,16 +388,118 @@ class SearchResponse(BaseModel):
     )
 
 
-@app.get("/", response_class=HTMLResponse)
-async def root():
-    html_content = """
+class SearchBatchQuery(BaseModel):
+    query_vectors: List[List[FiniteFloat]] = Field(
+        ...,
+        example=[[0.1, 0.2], [0.2, 0.3]],
+        description="Query vectors for similarity search",
+    )
+    top_k: int = Field(
+        default=5, ge=1, le=1000, description="Number of matches per query"
+    )
+
+
+class Vector(BaseModel):
+    id: str = Field(..., description="Vector ID")
+    values: List[FiniteFloat] = Field(..., description="Vector values")
+    metadata: Optional[Dict[str, Any]] = Field(
+        default=None, description="Metadata stored with the vector"
+    )
+
+    def to_pinecone(self) -> Dict[str, Any]:
+        """Pineconeのupsertに渡す辞書に変換する"""
+        vector = {"id": self.id, "values": self.values}
+        if self.metadata is not None:
+            vector["metadata"] = self.metadata
+        return vector
+
+
+class UpsertRequest(BaseModel):
+    vectors: List[Vector] = Field(
+        ...,
+        example=[
+            {
+                "id": "vec1",
+                "values": [0.1, 0.2],
+                "metadata": {"description": "First vector"},
+            },
+            {
+                "id": "vec2",
+                "values": [0.2, 0.3],
+                "metadata": {"description": "Second vector"},
+            },
+            {
+                "id": "vec3",
+                "values": [0.1, 0.15],
+                "metadata": {"description": "Third vector"},
+            },
+        ],
+        description="Vectors to upsert (id, values, metadata)",
+    )
+    batch_size: int = Field(
+        default=100, ge=1, description="Number of vectors sent per upsert request"
+    )
+    quantization: Optional[Literal["int8"]] = Field(
+        default=None,
+        description="Quantize vector values to int8 codes before upserting",
+    )
+
+
+# トップページのHTML（起動時に一度だけエンコードし、ETagを計算しておく）
+ROOT_HTML = """
     <!DOCTYPE html>
     <html lang="ja">
     <head>
         <title>Pinecone ベクトル検索 API</title>
         <meta charset="UTF-8">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <script src="https://cdn.tailwindcss.com"></script>
+        <style>
+            *, ::before, ::after { box-sizing: border-box; }
+            body { margin: 0; font-family: ui-sans-serif, system-ui, sans-serif; line-height: 1.5; }
+            h1, h2, p, ul { margin: 0; }
+            ul { padding: 0; list-style: none; }
+            a { text-decoration: none; }
+            .container { width: 100%; }
+            .mx-auto { margin-left: auto; margin-right: auto; }
+            .max-w-4xl { max-width: 56rem; }
+            .flex { display: flex; }
+            .items-start { align-items: flex-start; }
+            .inline-block { display: inline-block; }
+            .text-center { text-align: center; }
+            .p-6 { padding: 1.5rem; }
+            .px-1 { padding-left: 0.25rem; padding-right: 0.25rem; }
+            .px-4 { padding-left: 1rem; padding-right: 1rem; }
+            .px-6 { padding-left: 1.5rem; padding-right: 1.5rem; }
+            .py-3 { padding-top: 0.75rem; padding-bottom: 0.75rem; }
+            .py-8 { padding-top: 2rem; padding-bottom: 2rem; }
+            .mb-2 { margin-bottom: 0.5rem; }
+            .mb-4 { margin-bottom: 1rem; }
+            .mb-8 { margin-bottom: 2rem; }
+            .mt-8 { margin-top: 2rem; }
+            .mr-2 { margin-right: 0.5rem; }
+            .space-y-3 > * + * { margin-top: 0.75rem; }
+            .text-sm { font-size: 0.875rem; line-height: 1.25rem; }
+            .text-xl { font-size: 1.25rem; line-height: 1.75rem; }
+            .text-3xl { font-size: 1.875rem; line-height: 2.25rem; }
+            .font-semibold { font-weight: 600; }
+            .font-bold { font-weight: 700; }
+            .text-white { color: #fff; }
+            .text-gray-500 { color: #6b7280; }
+            .text-gray-600 { color: #4b5563; }
+            .text-gray-700 { color: #374151; }
+            .text-blue-500 { color: #3b82f6; }
+            .text-green-500 { color: #22c55e; }
+            .bg-white { background-color: #fff; }
+            .bg-gray-50 { background-color: #f9fafb; }
+            .bg-gray-100 { background-color: #f3f4f6; }
+            .bg-blue-500 { background-color: #3b82f6; }
+            .hover\\:bg-blue-700:hover { background-color: #1d4ed8; }
+            .rounded { border-radius: 0.25rem; }
+            .rounded-lg { border-radius: 0.5rem; }
+            .shadow-md { box-shadow: 0 4px 6px -1px rgb(0 0 0 / 0.1), 0 2px 4px -2px rgb(0 0 0 / 0.1); }
+            .transition { transition-property: color, background-color; transition-timing-function: cubic-bezier(0.4, 0, 0.2, 1); }
+            .duration-200 { transition-duration: 200ms; }
+        </style>
     </head>
     <body class="bg-gray-50">
         <div class="container mx-auto px-4 py-8 max-w-4xl">
@@ -82,6 +528,10 @@ async def root():
                         <span class="text-blue-500 mr-2">→</span>
                         <span>類似ベクトル検索（<code class="bg-gray-100 px-1 rounded">/search</code>）</span>
                     </li>
+                    <li class="flex items-start">
+                        <span class="text-blue-500 mr-2">→</span>
+                        <span>複数ベクトルの一括検索（<code class="bg-gray-100 px-1 rounded">/search_batch</code>）</span>
+                    </li>
                     <li class="flex items-start">
                         <span class="text-blue-500 mr-2">→</span>
                         <span>インデックス状態の確認（<code class="bg-gray-100 px-1 rounded">/status</code>）</span>
@@ -121,7 +571,19 @@ async def root():
     </body>
     </html>
     """
-    return HTMLResponse(content=html_content)
+
+ROOT_HTML_BYTES = ROOT_HTML.encode("utf-8")
+ROOT_HTML_HEADERS = {
+    "ETag": f'"{hashlib.md5(ROOT_HTML_BYTES).hexdigest()}"',
+    "Cache-Control": "public, max-age=3600",
+}
+
+
+@app.get("/", response_class=HTMLResponse)
+async def root(request: Request):
+    if request.headers.get("if-none-match") == ROOT_HTML_HEADERS["ETag"]:
+        return Response(status_code=304, headers=ROOT_HTML_HEADERS)
+    return HTMLResponse(content=ROOT_HTML_BYTES, headers=ROOT_HTML_HEADERS)
 
 
 # StatusエンドポイントとIndexStats定義
@@ -132,45 +594,121 @@ class IndexStats(BaseModel):
 
 
 @app.get("/status")
-async def status():
+async def status(request: Request):
+    state = request.app.state
     try:
-        indexes = pc.list_indexes()
-        return {
-            "indexes": [
-                {"name": idx.name, "host": idx.host, "dimension": idx.dimension}
-                for idx in indexes
-            ]
-        }
+        # ロック中に取得することで、期限切れ時の同時アクセスでも取得は1回に抑える
+        async with state.status_lock:
+            if time.monotonic() >= state.status_expires_at:
+                async with pinecone_admission(request.app):
+                    async with pinecone_call(request.app, "list_indexes"):
+                        indexes = await state.pc.list_indexes()
+                state.status_cache = {
+                    "indexes": [
+                        {"name": idx.name, "host": idx.host, "dimension": idx.dimension}
+                        for idx in indexes
+                    ]
+                }
+                state.status_expires_at = time.monotonic() + STATUS_CACHE_TTL
+            return state.status_cache
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# 入力値の検証（Pineconeを呼び出す前に不正なリクエストを拒否する）
+def dimension_error(dimension: int) -> HTTPException:
+    return HTTPException(
+        status_code=422, detail=f"Vectors must have {dimension} dimensions"
+    )
+
+
+def validate_search_query(query: SearchQuery, request: Request) -> SearchQuery:
+    if query.vector.shape[0] != request.app.state.dimension:
+        raise dimension_error(request.app.state.dimension)
+    return query
+
+
+def validate_search_batch_query(
+    query: SearchBatchQuery, request: Request
+) -> SearchBatchQuery:
+    if not query.query_vectors:
+        raise HTTPException(status_code=422, detail="query_vectors must not be empty")
+    if len(query.query_vectors) > MAX_BATCH_QUERIES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {MAX_BATCH_QUERIES} query vectors are allowed",
+        )
+    if len(query.query_vectors) * query.top_k > MAX_BATCH_MATCHES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"query_vectors x top_k must not exceed {MAX_BATCH_MATCHES}",
+        )
+    dimension = request.app.state.dimension
+    if any(len(v) != dimension for v in query.query_vectors):
+        raise dimension_error(dimension)
+    return query
+
+
+def validate_upsert_request(body: UpsertRequest, request: Request) -> UpsertRequest:
+    if not body.vectors:
+        raise HTTPException(status_code=422, detail="vectors must not be empty")
+    if len(body.vectors) > MAX_UPSERT_VECTORS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {MAX_UPSERT_VECTORS} vectors are allowed",
+        )
+    dimension = request.app.state.dimension
+    if any(len(v.values) != dimension for v in body.vectors):
+        raise dimension_error(dimension)
+    if body.quantization == "int8":
+        # 量子化で変わるのはベクトルの大きさだけなので、コサイン類似度でのみ許可する
+        if request.app.state.metric != "cosine":
+            raise HTTPException(
+                status_code=422,
+                detail="int8 quantization requires an index with the cosine metric",
+            )
+        if any(QUANTIZATION_SCALE_KEY in (v.metadata or {}) for v in body.vectors):
+            raise HTTPException(
+                status_code=422,
+                detail=f"metadata key '{QUANTIZATION_SCALE_KEY}' is reserved for int8 quantization",
+            )
+    return body
+
+
 # Upsertエンドポイント
 @app.post("/upsert")
-async def upsert_vectors():
-    try:
-        vectors = [
-            {
-                "id": "vec1",
-                "values": [0.1, 0.2],
-                "metadata": {"description": "First vector"},
-            },
-            {
-                "id": "vec2",
-                "values": [0.2, 0.3],
-                "metadata": {"description": "Second vector"},
-            },
-            {
-                "id": "vec3",
-                "values": [0.1, 0.15],
-                "metadata": {"description": "Third vector"},
-            },
-        ]
+async def upsert_vectors(
+    request: Request, body: UpsertRequest = Depends(validate_upsert_request)
+):
+    fanout = asyncio.Semaphore(PINECONE_REQUEST_FANOUT)
+
+    async def upsert_batch(batch: Tuple[Dict[str, Any], ...]):
+        async with fanout, pinecone_call(request.app, "upsert"):
+            await request.app.state.index.upsert(vectors=list(batch))
 
-        index.upsert(vectors=vectors)
-        return {"message": "Vectors upserted successfully", "count": len(vectors)}
+    try:
+        if body.quantization == "int8":
+            vectors = [quantize_vector(v) for v in body.vectors]
+        else:
+            vectors = [v.to_pinecone() for v in body.vectors]
+        # チャンクごとのupsertを、同時実行数を制限しつつ並行して発行する
+        async with pinecone_admission(request.app):
+            await gather_or_cancel(
+                upsert_batch(batch) for batch in chunks(vectors, body.batch_size)
+            )
+        return {
+            "message": "Vectors upserted successfully",
+            "count": len(body.vectors),
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # 一部のバッチだけが書き込まれた場合も含め、キャッシュ済みの検索結果を破棄する
+        request.app.state.search_cache.clear()
 
 
 # 検索エンドポイント
@@ -197,25 +735,99 @@ async def upsert_vectors():
         }
     },
 )
-async def search(query: SearchQuery):
+async def search(
+    request: Request, query: SearchQuery = Depends(validate_search_query)
+):
+    vector = query.vector
+    cache = request.app.state.search_cache
+    cached = cache.get(vector)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+    generation = cache.generation
     try:
-        results = index.query(vector=query.query_vector, top_k=5, include_metadata=True)
-        return {
-            "matches": [
-                {"id": match.id, "score": match.score, "metadata": match.metadata}
-                for match in results.matches
-            ]
-        }
+        async with pinecone_admission(request.app), pinecone_call(request.app, "query"):
+            results = await request.app.state.index.query(
+                vector=vector.tolist(), top_k=5, include_metadata=True
+            )
+        # response_modelによる再検証を避けるため、orjsonで直接エンコードして返す
+        body = orjson.dumps({"matches": serialize_matches(results.matches)})
+        cache.put(vector, body, generation)
+        return Response(content=body, media_type="application/json")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# バッチ検索エンドポイント
+@app.post(
+    "/search_batch",
+    response_model=List[SearchResponse],
+    description="Search for similar vectors with multiple query vectors",
+)
+async def search_batch(
+    request: Request, query: SearchBatchQuery = Depends(validate_search_batch_query)
+):
+    fanout = asyncio.Semaphore(PINECONE_REQUEST_FANOUT)
+
+    async def run_query(vector: List[float]):
+        async with fanout, pinecone_call(request.app, "query"):
+            results = await request.app.state.index.query(
+                vector=vector, top_k=query.top_k, include_metadata=True
+            )
+        return {"matches": serialize_matches(results.matches)}
+
+    try:
+        # gatherは入力順に結果を返すため、レスポンスの順序はクエリの順序と一致する
+        async with pinecone_admission(request.app):
+            responses = await gather_or_cancel(
+                run_query(v) for v in query.query_vectors
+            )
+        return Response(content=orjson.dumps(responses), media_type="application/json")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Swagger UIの静的ファイル
+# static/swagger-ui に配置されていればCDNの代わりにローカルから配信する
+SWAGGER_UI_VERSION = "5.18.2"
+SWAGGER_UI_DIR = Path(__file__).parent / "static" / "swagger-ui"
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """バージョン付きURLで配信する静的ファイルに長期キャッシュのヘッダーを付与する"""
+
+    def file_response(self, *args, **kwargs) -> Response:
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+
+if (SWAGGER_UI_DIR / "swagger-ui-bundle.js").exists():
+    app.mount(
+        "/static/swagger-ui",
+        ImmutableStaticFiles(directory=SWAGGER_UI_DIR),
+        name="swagger-ui",
+    )
+    swagger_ui_url = "/static/swagger-ui/{}?v=" + SWAGGER_UI_VERSION
+else:
+    swagger_ui_url = (
+        f"https://cdn.jsdelivr.net/npm/swagger-ui-dist@{SWAGGER_UI_VERSION}/{{}}"
+    )
+
+# Swagger UIのHTMLは内容が変わらないため、起動時に一度だけ生成する
+SWAGGER_UI_HTML = get_swagger_ui_html(
+    openapi_url="/openapi.json",
+    title="Vector Search API - Documentation",
+    swagger_js_url=swagger_ui_url.format("swagger-ui-bundle.js"),
+    swagger_css_url=swagger_ui_url.format("swagger-ui.css"),
+    swagger_favicon_url=swagger_ui_url.format("favicon-32x32.png"),
+).body
+
+
 # カスタムSwagger UIエンドポイント
 @app.get("/docs", include_in_schema=False)
 async def custom_swagger_ui_html():
-    return get_swagger_ui_html(
-        openapi_url="/openapi.json",
-        title="Vector Search API - Documentation",
-        swagger_js_url="https://cdn.jsdelivr.net/npm/swagger-ui-dist@5/swagger-ui-bundle.js",
-        swagger_css_url="https://cdn.jsdelivr.net/npm/swagger-ui-dist@5/swagger-ui.css",
-    )
+    return HTMLResponse(content=SWAGGER_UI_HTML)
@@ -12,7 +12,8 @@ existing_indexes = pc.list_indexes()
 print("Existing indexes:", existing_indexes)
 
 # インデックスが存在しない場合のみ作成
-if index_name not in [index.name for index in existing_indexes]:
+existing_names = {index.name for index in existing_indexes}
+if index_name not in existing_names:
     pc.create_index(
         name=index_name,
         dimension=2,
@@ -20,11 +21,12 @@ if index_name not in [index.name for index in existing_indexes]:
         spec=ServerlessSpec(cloud="aws", region="us-east-1"),
     )
     print(f"Created new index: {index_name}")
+    existing_names.add(index_name)
 else:
     print(f"Index '{index_name}' already exists")
 
 # インデックスの取得
 index = pc.Index(index_name)
 
-# インデックス情報の確認
-print("Current indexes:", pc.list_indexes())
+# インデックス情報の確認（取得済みの一覧を再利用し、list_indexesの再呼び出しを省略する）
+print("Current indexes:", sorted(existing_names))